@@ -1,21 +1,36 @@
 import os
 import sys
-
+from enum import IntEnum
+from functools import lru_cache, partial
+from itertools import islice
+
+from PySide6.QtCore import (
+    QAbstractTableModel,
+    QModelIndex,
+    QObject,
+    QRunnable,
+    QSignalBlocker,
+    Qt,
+    QThreadPool,
+    QTimer,
+    Signal,
+)
+from PySide6.QtGui import QFontDatabase, QStandardItem, QStandardItemModel
 from PySide6.QtWidgets import (
     QApplication,
     QComboBox,
     QFileDialog,
     QFormLayout,
+    QHeaderView,
     QLabel,
     QLineEdit,
     QMainWindow,
     QMessageBox,
     QSpinBox,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QToolBar,
     QWidget,
-    QTextEdit,
+    QPlainTextEdit,
     QVBoxLayout,
     QHBoxLayout,
     QPushButton,
@@ -23,30 +38,227 @@ from PySide6.QtWidgets import (
 
 from backend import PSApp
 
-TYPE_MAP = {"Изделие": "I", "Узел": "U", "Деталь": "D"}
-TYPE_RU = {"I": "Изделие", "U": "Узел", "D": "Деталь"}
+
+class Typ(IntEnum):
+    """Тип компонента в GUI; имя члена — буква типа в файле .prd."""
+
+    I = 0
+    U = 1
+    D = 2
+
+
+TYPE_RU = ("Изделие", "Узел", "Деталь")  # индекс — Typ
+TYPE_CODE = {t.name: t for t in Typ}
+
+
+def type_code(letter: str) -> int:
+    return TYPE_CODE.get(letter, -1)
+
+
+def type_name(t: int) -> str:
+    return TYPE_RU[t] if 0 <= t < len(TYPE_RU) else "?"
+
+
+TREE_CHUNK_LINES = 50  # строк дерева за один проход event loop
+
+
+@lru_cache(maxsize=4096)
+def combo_label(name: str, typ: int) -> str:
+    return f"{name} ({type_name(typ)})"
 
 
 def show_error(parent, title: str, text: str) -> None:
     QMessageBox.critical(parent, title, text)
 
 
+class WorkerSignals(QObject):
+    finished = Signal(object)
+    error = Signal(str)
+
+
+class BackendWorker(QRunnable):
+    """Вызов backend в QThreadPool; результат возвращается в GUI-поток сигналом."""
+
+    def __init__(self, fn, *args) -> None:
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = WorkerSignals()
+
+    def run(self) -> None:
+        try:
+            result = self.fn(*self.args)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+            return
+        self.signals.finished.emit(result)
+
+
+class ConfirmBox:
+    """Вопрос Да/Нет на одном переиспользуемом QMessageBox."""
+
+    def __init__(self, parent) -> None:
+        self._parent = parent
+        self._box: QMessageBox | None = None
+
+    def ask(self, title: str, text: str) -> bool:
+        if self._box is None:
+            self._box = QMessageBox(self._parent)
+            self._box.setIcon(QMessageBox.Question)
+            self._box.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
+        self._box.setWindowTitle(title)
+        self._box.setText(text)
+        return self._box.exec() == QMessageBox.Yes
+
+
+def form_box(parent, title: str, text: str, w: QWidget) -> QMessageBox:
+    """QMessageBox Ok/Cancel со встроенной формой w."""
+    box = QMessageBox(parent)
+    box.setWindowTitle(title)
+    box.setText(text)
+    box.layout().addWidget(w, 1, 0, 1, box.layout().columnCount())
+    box.setStandardButtons(QMessageBox.Ok | QMessageBox.Cancel)
+    return box
+
+
+class RowsModel(QAbstractTableModel):
+    """Модель таблицы поверх готового списка кортежей из backend."""
+
+    # (заголовок, форматтер) на колонку; колонка i показывает форматтер(row[i])
+    COLUMNS: tuple = ()
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._rows: list = []
+
+    def set_rows(self, rows: list) -> None:
+        # повторный refresh с теми же данными не трогает view вовсе
+        if rows == self._rows:
+            return
+        if not self._update_rows(rows):
+            self.beginResetModel()
+            self._rows = rows
+            self.endResetModel()
+
+    def _update_rows(self, rows: list) -> bool:
+        """Точечно применить разницу по имени (1-я колонка); False — нужен
+        полный сброс."""
+        old = self._rows
+        if not old or not rows:
+            return False
+
+        old_keys = {r[0].casefold() for r in old}
+        new_keys = {r[0].casefold() for r in rows}
+        kept_old = [r for r in old if r[0].casefold() in new_keys]
+        kept_new = [r for r in rows if r[0].casefold() in old_keys]
+        # оба списка отсортированы backend'ом, иначе вставка по индексам неверна
+        if [r[0].casefold() for r in kept_old] != [r[0].casefold() for r in kept_new]:
+            return False
+
+        removed = len(old) - len(kept_old)
+        added = len(rows) - len(kept_new)
+        changed = sum(1 for a, b in zip(kept_old, kept_new) if a != b)
+        if removed + added + changed > len(rows) // 2:
+            return False
+
+        cur = self._rows = list(old)
+        for i in range(len(cur) - 1, -1, -1):
+            if cur[i][0].casefold() not in new_keys:
+                self.beginRemoveRows(QModelIndex(), i, i)
+                del cur[i]
+                self.endRemoveRows()
+
+        for i, r in enumerate(rows):
+            if r[0].casefold() not in old_keys:
+                self.beginInsertRows(QModelIndex(), i, i)
+                cur.insert(i, r)
+                self.endInsertRows()
+
+        last_col = len(self.COLUMNS) - 1
+        for i, r in enumerate(rows):
+            if cur[i] != r:
+                cur[i] = r
+                self.dataChanged.emit(self.index(i, 0), self.index(i, last_col))
+
+        self._rows = rows
+        return True
+
+    def name_at(self, row: int) -> str | None:
+        if 0 <= row < len(self._rows):
+            return self._rows[row][0]
+        return None
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        column = index.column()
+        return self.COLUMNS[column][1](self._rows[index.row()][column])
+
+
+class ComponentsModel(RowsModel):
+    """Строки (name, Typ)."""
+
+    COLUMNS = (("Имя", str), ("Тип", type_name))
+
+
+class SpecModel(RowsModel):
+    """Строки (b_name, Typ, qty)."""
+
+    COLUMNS = (("Компонент B", str), ("Тип", type_name), ("Кол-во", str))
+
+
 class TreeWindow(QMainWindow):
-    def __init__(self, text: str):
+    closed = Signal()
+
+    def __init__(self, text: str = ""):
         super().__init__()
         self.setWindowTitle("Дерево структуры")
         self.resize(600, 500)
 
-        edit = QTextEdit()
-        edit.setReadOnly(True)
-        edit.setText(text)
-        self.setCentralWidget(edit)
+        self.edit = QPlainTextEdit()
+        self.edit.setReadOnly(True)
+        self.edit.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.edit.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.edit.setPlainText(text)
+        self.setCentralWidget(self.edit)
+
+    def append_lines(self, lines: list[str]) -> None:
+        self.edit.appendPlainText("\n".join(lines))
+
+    def closeEvent(self, event) -> None:
+        self.closed.emit()
+        super().closeEvent(event)
 
 
 class SpecWindow(QMainWindow):
-    def __init__(self, backend: PSApp):
+    # True — окно работает с backend в фоне; MainWindow на это время блокирует
+    # свои команды
+    busy_changed = Signal(bool)
+
+    def __init__(self, backend: PSApp, get_components):
         super().__init__()
         self.backend = backend
+        self._get_components = get_components  # кэш списка компонентов MainWindow
+        self._spec_cache: dict[str, list] = {}
+        # растёт при каждой инвалидации: результаты более ранних фоновых загрузок
+        # устарели
+        self._generation = 0
+        self._busy = False
+        self._add_box: QMessageBox | None = None
+        self._confirm = ConfirmBox(self)
+        self._worker: BackendWorker | None = None
+        self._tree_iter = None
 
         self.setWindowTitle("Спецификация")
         self.resize(750, 450)
@@ -67,9 +279,13 @@ class SpecWindow(QMainWindow):
         btn_refresh.clicked.connect(self.reload_a_list)
         top.addWidget(btn_refresh)
 
-        self.table = QTableWidget(0, 3)
-        self.table.setHorizontalHeaderLabels(["Компонент B", "Тип", "Кол-во"])
-        self.table.horizontalHeader().setStretchLastSection(True)
+        self._model = SpecModel(self)
+        self.table = QTableView()
+        self.table.setModel(self._model)
+        header = self.table.horizontalHeader()
+        header.setDefaultSectionSize(180)
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setStretchLastSection(True)
         layout.addWidget(self.table, 1)
 
         bottom = QHBoxLayout()
@@ -97,38 +313,105 @@ class SpecWindow(QMainWindow):
         self.cb_a.currentIndexChanged.connect(self.load_spec)
 
     def reload_a_list(self) -> None:
-        self.cb_a.clear()
         # A должен быть только изделие/узел
-        for name, typ in self.backend.get_components():
-            if typ in ("I", "U"):
-                self.cb_a.addItem(name)
+        names = [name for name, typ in self._get_components() if 0 <= typ < Typ.D]
+
+        # без блокировки clear()/addItems() дёргают load_spec через currentIndexChanged
+        with QSignalBlocker(self.cb_a):
+            self.cb_a.clear()
+            self.cb_a.addItems(names)
 
-        if self.cb_a.count() == 0:
-            self.table.setRowCount(0)
+        self.load_spec()
 
     def _current_a(self) -> str | None:
         a = self.cb_a.currentText().strip()
         return a if a else None
 
+    def invalidate_cache(self) -> None:
+        self._spec_cache.clear()
+        self._generation += 1
+        # генератор дерева держит записи и смещения прежних файлов — дальше его
+        # не читать
+        if self._tree_iter is not None:
+            self._tree_win.append_lines(["[вывод прерван: данные изменились]"])
+            self._cancel_tree()
+
+    def _cancel_tree(self) -> None:
+        # таймер, уже поставленный в очередь, увидит смену _tree_iter и ничего
+        # не сделает
+        self._tree_iter = None
+        self._set_busy(False)
+
+    def _on_tree_closed(self, w: TreeWindow) -> None:
+        # закрыто окно текущего вывода — дочитывать дерево некуда
+        if w is self._tree_win and self._tree_iter is not None:
+            self._cancel_tree()
+
+    def get_spec_cached(self, a: str) -> list:
+        key = a.lower()
+        rows = self._spec_cache.get(key)
+        if rows is None:
+            rows = self._read_spec(a)
+            self._spec_cache[key] = rows
+        return rows
+
+    def _read_spec(self, a: str) -> list:
+        # [(b_name, Typ, qty), ...]
+        return [(b, type_code(t), q) for b, t, q in self.backend.get_spec(a)]
+
     def load_spec(self) -> None:
         a = self._current_a()
         if not a:
-            self.table.setRowCount(0)
+            self._model.set_rows([])
             return
 
-        try:
-            rows = self.backend.get_spec(a)  # [(b_name, b_typ, qty), ...]
-        except Exception as e:
-            show_error(self, "Ошибка", str(e))
+        rows = self._spec_cache.get(a.lower())
+        if rows is not None:
+            self._apply_spec_rows(rows)
             return
 
-        self.table.setRowCount(len(rows))
-        for i, (b_name, b_typ, qty) in enumerate(rows):
-            self.table.setItem(i, 0, QTableWidgetItem(b_name))
-            self.table.setItem(i, 1, QTableWidgetItem(TYPE_RU.get(b_typ, "?")))
-            self.table.setItem(i, 2, QTableWidgetItem(str(qty)))
+        self._start_worker(self._on_spec_loaded, self._fetch_spec, a, self._generation)
+
+    def _fetch_spec(self, a: str, generation: int) -> tuple[int, str, list]:
+        return generation, a, self._read_spec(a)
 
-        self.table.resizeColumnsToContents()
+    def _on_spec_loaded(self, result: tuple[int, str, list]) -> None:
+        self._set_busy(False)
+        generation, a, rows = result
+        if generation != self._generation:
+            # пока шло чтение, кэш сбросили: строки могли устареть, читаем заново
+            self.load_spec()
+            return
+        self._spec_cache[a.lower()] = rows
+        if a == self._current_a():
+            self._apply_spec_rows(rows)
+
+    def _apply_spec_rows(self, rows: list) -> None:
+        self._model.set_rows(rows)
+
+    def _start_worker(self, on_finished, fn, *args) -> None:
+        # пока backend читает файлы в фоне, окно недоступно для новых команд
+        self._set_busy(True)
+        worker = BackendWorker(fn, *args)
+        worker.signals.finished.connect(on_finished)
+        worker.signals.error.connect(self._on_worker_error)
+        self._worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_worker_error(self, text: str) -> None:
+        self._set_busy(False)
+        show_error(self, "Ошибка", text)
+
+    def _set_busy(self, busy: bool) -> None:
+        self.centralWidget().setEnabled(not busy)
+        if not busy:
+            self._worker = None
+        if busy != self._busy:
+            self._busy = busy
+            self.busy_changed.emit(busy)
+
+    def is_busy(self) -> bool:
+        return self._busy
 
     def add_item(self) -> None:
         a = self._current_a()
@@ -136,88 +419,96 @@ class SpecWindow(QMainWindow):
             show_error(self, "Ошибка", "Выберите компонент A (изделие/узел).")
             return
 
-        before = {}
         try:
-            for b_name, b_typ, qty in self.backend.get_spec(a):
-                before[b_name.lower()] = qty
+            before = {
+                b_name.casefold(): qty for b_name, _, qty in self.get_spec_cached(a)
+            }
         except Exception:
             before = {}
 
-        w = QWidget()
-        form = QFormLayout(w)
+        if self._add_box is None:
+            self._build_add_dialog()
+        cb_b = self._add_cb_b
+        sp_qty = self._add_sp_qty
 
-        cb_b = QComboBox()
         # B может быть любой, кроме A
-        for name, typ in self.backend.get_components():
-            if name.strip().lower() == a.strip().lower():
+        a_key = a.strip().lower()
+        # модель собирается отдельно от combobox и подставляется целиком;
+        # предыдущая модель (родитель — cb_b) удаляется самим setModel
+        model = QStandardItemModel(cb_b)
+        append_row = model.appendRow
+        for name, typ in self._get_components():
+            if name.strip().lower() == a_key:
                 continue
-            cb_b.addItem(f"{name} ({TYPE_RU.get(typ, '?')})", userData=name)
-
-        sp_qty = QSpinBox()
-        sp_qty.setRange(1, 9999)
+            item = QStandardItem(combo_label(name, typ))
+            item.setData(name, Qt.UserRole)
+            append_row(item)
+        cb_b.setModel(model)
         sp_qty.setValue(1)
 
-        form.addRow("Компонент B:", cb_b)
-        form.addRow("Количество:", sp_qty)
-
-        box = QMessageBox(self)
-        box.setWindowTitle("Добавление элемента спецификации")
-        box.setText("Введите данные элемента:")
-        box.layout().addWidget(w, 1, 0, 1, box.layout().columnCount())
-        box.setStandardButtons(QMessageBox.Ok | QMessageBox.Cancel)
-
-        if box.exec() != QMessageBox.Ok:
+        if self._add_box.exec() != QMessageBox.Ok:
             return
 
-        b = cb_b.currentData()
+        b = cb_b.currentData(Qt.UserRole)
         qty = int(sp_qty.value())
 
         try:
             self.backend.add_spec(a, b, qty)
-            self.load_spec()
+            self._spec_cache.pop(a.lower(), None)
+            rows = self.get_spec_cached(a)
+            self._apply_spec_rows(rows)
 
-            after = {}
-            for b_name, b_typ, q in self.backend.get_spec(a):
-                after[b_name.lower()] = q
+            after = {b_name.casefold(): q for b_name, _, q in rows}
 
-            if b.lower() in before:
+            b_key = b.casefold()
+            if b_key in before:
                 QMessageBox.information(
                     self,
                     "Обновлено",
-                    f"Количество для '{b}' изменено: {before[b.lower()]} → {after[b.lower()]}"
+                    f"Количество для '{b}' изменено: {before[b_key]} → {after[b_key]}"
                 )
             else:
                 QMessageBox.information(self, "Добавлено", f"Элемент '{b}' добавлен.")
         except Exception as e:
             show_error(self, "Ошибка", str(e))
 
+    def _build_add_dialog(self) -> None:
+        w = QWidget()
+        form = QFormLayout(w)
+
+        self._add_cb_b = QComboBox()
+        self._add_sp_qty = QSpinBox()
+        self._add_sp_qty.setRange(1, 9999)
+
+        form.addRow("Компонент B:", self._add_cb_b)
+        form.addRow("Количество:", self._add_sp_qty)
+
+        self._add_box = form_box(
+            self, "Добавление элемента спецификации", "Введите данные элемента:", w
+        )
+
     def remove_item(self) -> None:
         a = self._current_a()
         if not a:
             show_error(self, "Ошибка", "Выберите компонент A.")
             return
 
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             QMessageBox.information(self, "Удаление", "Выберите строку в таблице.")
             return
 
-        b_item = self.table.item(row, 0)
-        if not b_item:
+        b = self._model.name_at(row)
+        if not b:
             return
-        b = b_item.text().strip()
+        b = b.strip()
 
-        ans = QMessageBox.question(
-            self,
-            "Удаление",
-            f"Удалить связь '{a} / {b}'?",
-            QMessageBox.Yes | QMessageBox.No,
-        )
-        if ans != QMessageBox.Yes:
+        if not self._confirm.ask("Удаление", f"Удалить связь '{a} / {b}'?"):
             return
 
         try:
             self.backend.delete_spec(a, b)
+            self._spec_cache.pop(a.lower(), None)
             self.load_spec()
         except Exception as e:
             show_error(self, "Ошибка", str(e))
@@ -229,15 +520,41 @@ class SpecWindow(QMainWindow):
             return
 
         try:
-            text = self.backend.build_tree_text(a)
+            lines = self.backend.build_tree_text_iter(a)
         except Exception as e:
             show_error(self, "Ошибка", str(e))
             return
 
-        w = TreeWindow(text)
+        w = TreeWindow()
+        w.closed.connect(partial(self._on_tree_closed, w))
         w.show()
         self._tree_win = w  # сохранить ссылку
 
+        # дерево выводится порциями, между ними event loop успевает перерисовать окно
+        self._tree_iter = lines
+        self._set_busy(True)
+        QTimer.singleShot(0, partial(self._stream_tree, lines))
+
+    def _stream_tree(self, lines) -> None:
+        # таймер отменённого (invalidate_cache) или уже сменённого вывода — пропустить
+        if lines is not self._tree_iter:
+            return
+        try:
+            chunk = list(islice(lines, TREE_CHUNK_LINES))
+        except Exception as e:
+            self._tree_iter = None
+            self._set_busy(False)
+            show_error(self, "Ошибка", str(e))
+            return
+
+        if chunk:
+            self._tree_win.append_lines(chunk)
+        if len(chunk) < TREE_CHUNK_LINES:
+            self._tree_iter = None
+            self._set_busy(False)
+            return
+        QTimer.singleShot(0, partial(self._stream_tree, lines))
+
 
 class MainWindow(QMainWindow):
     def __init__(self) -> None:
@@ -250,14 +567,22 @@ class MainWindow(QMainWindow):
         self.status = QLabel("Файлы не открыты")
         self.statusBar().addWidget(self.status)
 
-        self.table = QTableWidget(0, 2)
-        self.table.setHorizontalHeaderLabels(["Имя", "Тип"])
-        self.table.horizontalHeader().setStretchLastSection(True)
+        self._model = ComponentsModel(self)
+        self.table = QTableView()
+        self.table.setModel(self._model)
+        header = self.table.horizontalHeader()
+        header.setDefaultSectionSize(180)
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setStretchLastSection(True)
         self.setCentralWidget(self.table)
 
         self._build_toolbar()
 
         self._spec_win = None
+        self._components_cache: list | None = None
+        self._create_box: QMessageBox | None = None
+        self._add_box: QMessageBox | None = None
+        self._confirm = ConfirmBox(self)
 
     def _need_open(self) -> bool:
         try:
@@ -268,21 +593,18 @@ class MainWindow(QMainWindow):
             return False
 
     def _selected_name(self) -> str | None:
-        row = self.table.currentRow()
-        if row < 0:
-            return None
-        item = self.table.item(row, 0)
-        return item.text() if item else None
+        return self._model.name_at(self.table.currentIndex().row())
 
     def _build_toolbar(self) -> None:
         tb = QToolBar("Действия")
         self.addToolBar(tb)
+        self._toolbar = tb
 
         tb.addAction("Создать", self.on_create)
         tb.addAction("Открыть", self.on_open)
         tb.addSeparator()
 
-        tb.addAction("Обновить", self.refresh)
+        tb.addAction("Обновить", self.on_reload)
         tb.addAction("Добавить", self.on_add)
         tb.addAction("Удалить", self.on_delete)
         tb.addSeparator()
@@ -294,45 +616,43 @@ class MainWindow(QMainWindow):
 
         tb.addAction("Спецификация", self.open_spec_window)
 
-    def on_create(self) -> None:
+    def _build_create_dialog(self) -> None:
         w = QWidget()
         layout = QFormLayout(w)
 
-        e_name = QLineEdit("data")
-        sp_len = QSpinBox()
-        sp_len.setRange(4, 1000)
-        sp_len.setValue(40)
+        self._create_e_name = QLineEdit()
+        self._create_sp_len = QSpinBox()
+        self._create_sp_len.setRange(4, 1000)
 
-        layout.addRow("Имя базы (без .prd/.prs):", e_name)
-        layout.addRow("maxLen:", sp_len)
+        layout.addRow("Имя базы (без .prd/.prs):", self._create_e_name)
+        layout.addRow("maxLen:", self._create_sp_len)
 
-        box = QMessageBox(self)
-        box.setWindowTitle("Создание")
-        box.setText("Создать новую базу?")
-        box.layout().addWidget(w, 1, 0, 1, box.layout().columnCount())
-        box.setStandardButtons(QMessageBox.Ok | QMessageBox.Cancel)
+        self._create_box = form_box(self, "Создание", "Создать новую базу?", w)
+
+    def on_create(self) -> None:
+        if self._create_box is None:
+            self._build_create_dialog()
+        self._create_e_name.setText("data")
+        self._create_sp_len.setValue(40)
 
-        if box.exec() != QMessageBox.Ok:
+        if self._create_box.exec() != QMessageBox.Ok:
             return
 
-        base = e_name.text().strip()
-        maxlen = int(sp_len.value())
+        base = self._create_e_name.text().strip()
+        maxlen = int(self._create_sp_len.value())
         if not base:
             show_error(self, "Ошибка", "Имя базы пустое.")
             return
 
         if os.path.exists(base + ".prd") or os.path.exists(base + ".prs"):
-            ans = QMessageBox.question(
-                self,
-                "Перезапись",
-                "Файлы уже существуют. Перезаписать?",
-                QMessageBox.Yes | QMessageBox.No,
-            )
-            if ans != QMessageBox.Yes:
+            if not self._confirm.ask(
+                "Перезапись", "Файлы уже существуют. Перезаписать?"
+            ):
                 return
 
         try:
             self.backend.create(base, maxlen)
+            self._invalidate_cache()
             self.status.setText(f"Открыто: {base}.prd / {base}.prs")
             self.refresh()
         except Exception as e:
@@ -351,6 +671,7 @@ class MainWindow(QMainWindow):
         base = os.path.splitext(path)[0]
         try:
             self.backend.open(base)
+            self._invalidate_cache()
             self.status.setText(
                 f"Открыто: {os.path.basename(base)}.prd / {self.backend.prs_name}"
             )
@@ -358,54 +679,74 @@ class MainWindow(QMainWindow):
         except Exception as e:
             show_error(self, "Ошибка открытия", str(e))
 
-    def refresh(self) -> None:
-        if not self._need_open():
-            return
+    def get_components_cached(self) -> list:
+        if self._components_cache is None:
+            self._components_cache = [
+                (name, type_code(typ)) for name, typ in self.backend.get_components()
+            ]
+        return self._components_cache
 
-        rows = self.backend.get_components()
-        self.table.setRowCount(len(rows))
+    def _invalidate_cache(self) -> None:
+        self._components_cache = None
+        combo_label.cache_clear()
+        if self._spec_win is not None:
+            self._spec_win.invalidate_cache()
 
-        for i, (name, typ) in enumerate(rows):
-            self.table.setItem(i, 0, QTableWidgetItem(name))
-            self.table.setItem(i, 1, QTableWidgetItem(TYPE_RU.get(typ, "?")))
+    def _on_spec_busy(self, busy: bool) -> None:
+        # PSApp нельзя трогать из двух потоков: пока окно спецификации читает backend
+        # в фоне, команды, меняющие или переоткрывающие файлы, недоступны
+        self._toolbar.setEnabled(not busy)
 
-        self.table.resizeColumnsToContents()
+    def on_reload(self) -> None:
+        self._invalidate_cache()
+        self.refresh()
 
-    def on_add(self) -> None:
+    def refresh(self) -> None:
         if not self._need_open():
             return
 
-        w = QWidget()
-        layout = QFormLayout(w)
+        self._model.set_rows(self.get_components_cached())
 
-        e_name = QLineEdit()
-        cb = QComboBox()
-        cb.addItems(list(TYPE_MAP.keys()))
-
-        layout.addRow("Имя:", e_name)
-        layout.addRow("Тип:", cb)
+    def on_add(self) -> None:
+        if not self._need_open():
+            return
 
-        box = QMessageBox(self)
-        box.setWindowTitle("Добавление компонента")
-        box.setText("Введите данные компонента:")
-        box.layout().addWidget(w, 1, 0, 1, box.layout().columnCount())
-        box.setStandardButtons(QMessageBox.Ok | QMessageBox.Cancel)
+        if self._add_box is None:
+            self._build_add_dialog()
+        self._add_e_name.clear()
+        self._add_cb_type.setCurrentIndex(0)
 
-        if box.exec() != QMessageBox.Ok:
+        if self._add_box.exec() != QMessageBox.Ok:
             return
 
-        name = e_name.text().strip()
+        name = self._add_e_name.text().strip()
         if not name:
             show_error(self, "Ошибка", "Имя пустое.")
             return
 
-        typ = TYPE_MAP[cb.currentText()]
+        typ = Typ(self._add_cb_type.currentIndex()).name
         try:
             self.backend.add_component(name, typ)
+            self._invalidate_cache()
             self.refresh()
         except Exception as e:
             show_error(self, "Ошибка", str(e))
 
+    def _build_add_dialog(self) -> None:
+        w = QWidget()
+        layout = QFormLayout(w)
+
+        self._add_e_name = QLineEdit()
+        self._add_cb_type = QComboBox()
+        self._add_cb_type.addItems(list(TYPE_RU))
+
+        layout.addRow("Имя:", self._add_e_name)
+        layout.addRow("Тип:", self._add_cb_type)
+
+        self._add_box = form_box(
+            self, "Добавление компонента", "Введите данные компонента:", w
+        )
+
     def on_delete(self) -> None:
         if not self._need_open():
             return
@@ -415,17 +756,12 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Удаление", "Выберите компонент в таблице.")
             return
 
-        ans = QMessageBox.question(
-            self,
-            "Удаление",
-            f"Пометить '{name}' как удалённый?",
-            QMessageBox.Yes | QMessageBox.No,
-        )
-        if ans != QMessageBox.Yes:
+        if not self._confirm.ask("Удаление", f"Пометить '{name}' как удалённый?"):
             return
 
         try:
             self.backend.delete_component(name)
+            self._invalidate_cache()
             self.refresh()
         except Exception as e:
             show_error(self, "Ошибка", str(e))
@@ -441,6 +777,7 @@ class MainWindow(QMainWindow):
 
         try:
             self.backend.restore_one(name)
+            self._invalidate_cache()
             self.refresh()
         except Exception as e:
             show_error(self, "Ошибка", str(e))
@@ -449,17 +786,14 @@ class MainWindow(QMainWindow):
         if not self._need_open():
             return
 
-        ans = QMessageBox.question(
-            self,
-            "Восстановление",
-            "Восстановить все удалённые записи?",
-            QMessageBox.Yes | QMessageBox.No,
-        )
-        if ans != QMessageBox.Yes:
+        if not self._confirm.ask(
+            "Восстановление", "Восстановить все удалённые записи?"
+        ):
             return
 
         try:
             self.backend.restore_all()
+            self._invalidate_cache()
             self.refresh()
         except Exception as e:
             show_error(self, "Ошибка", str(e))
@@ -468,17 +802,15 @@ class MainWindow(QMainWindow):
         if not self._need_open():
             return
 
-        ans = QMessageBox.question(
-            self,
+        if not self._confirm.ask(
             "Уплотнение",
             "Физически уплотнить файлы (удалить помеченные записи)?",
-            QMessageBox.Yes | QMessageBox.No,
-        )
-        if ans != QMessageBox.Yes:
+        ):
             return
 
         try:
             self.backend.truncate()
+            self._invalidate_cache()
             self.refresh()
         except Exception as e:
             show_error(self, "Ошибка", str(e))
@@ -487,7 +819,10 @@ class MainWindow(QMainWindow):
         if not self._need_open():
             return
         if self._spec_win is None:
-            self._spec_win = SpecWindow(self.backend)
+            self._spec_win = SpecWindow(self.backend, self.get_components_cached)
+            self._spec_win.busy_changed.connect(self._on_spec_busy)
+            # первая загрузка спецификации стартует ещё в конструкторе окна
+            self._on_spec_busy(self._spec_win.is_busy())
         self._spec_win.show()
         self._spec_win.raise_()
         self._spec_win.activateWindow()
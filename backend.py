@@ -1,18 +1,33 @@
 from __future__ import annotations
 
+import mmap
 import os
 import struct
-from dataclasses import dataclass
-from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+import sys
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from operator import attrgetter, itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 PRD_SIG = b"PS"
 PRD_HDR_SIZE = 2 + 2 + 4 + 4 + 16
 PRS_HDR_SIZE = 4 + 4
 
-I8 = "<b"
-U16 = "<H"
-I16 = "<h"
-I32 = "<i"
+I8 = struct.Struct("<b")
+I32 = struct.Struct("<i")
+
+# O_BINARY есть только на Windows: без него os.read/os.write транслируют переводы строк
+O_RDWR_BIN = os.O_RDWR | getattr(os, "O_BINARY", 0)
+
+PRD_HDR = struct.Struct("<2sHii16s")  # sig, data_len, head, free, имя .prs
+PRS_HDR = struct.Struct("<ii")  # head, free
+PRS_REC = struct.Struct("<bihi")  # del_, comp_off, qty, next_
+ASCII_WS = bytes(c for c in range(128) if chr(c).isspace())  # как str.strip() для ASCII
+PRD_FIRST_OFF = 1  # смещение first_spec внутри записи PRD
+PRD_NEXT_OFF = 1 + 4  # смещение next_ внутри записи PRD
+
+# записи создаются тысячами на сканах: __slots__ там, где dataclass это умеет (3.10+)
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 
 def type_ru(t: str) -> str:
@@ -27,7 +42,7 @@ def eq(a: str, b: str) -> bool:
     return a.strip().lower() == b.strip().lower()
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class PrdRec:
     off: int
     del_: int
@@ -35,9 +50,14 @@ class PrdRec:
     next_: int
     typ: str
     name: str
+    # ключ сортировки и сравнения, считается один раз при загрузке записи
+    name_lc: str = field(init=False, repr=False, compare=False)
 
+    def __post_init__(self) -> None:
+        self.name_lc = self.name.lower()
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class PrsRec:
     off: int
     del_: int
@@ -52,16 +72,40 @@ class PSApp:
     def __init__(self) -> None:
         self.prd_path: Optional[str] = None
         self.prs_path: Optional[str] = None
-        self.prd: Optional[BinaryIO] = None
-        self.prs: Optional[BinaryIO] = None
-
-        self.data_len = 0
+        # дескрипторы ОС открытых файлов, -1 — не открыт
+        self.prd_fd = -1
+        self.prs_fd = -1
+        # записи читаются/пишутся прямо в отображённую память файлов
+        self.prd_mm: Optional[mmap.mmap] = None
+        self.prs_mm: Optional[mmap.mmap] = None
+        # имя (lower) -> смещения записей PRD с этим именем в физическом порядке,
+        # включая удалённые (имена, совпавшие после обрезки до data_len, — в одном
+        # списке)
+        self._name_to_offs: Dict[str, List[int]] = {}
+        # смещение родителя -> активные дети; заполняется лениво проверкой циклов
+        self._children: Dict[int, List[int]] = {}
+        # смещение родителя -> {смещение компонента: смещение активной записи PRS}
+        self._links: Dict[int, Dict[int, int]] = {}
+        # ключи и смещения в порядке логического списка PRD (удалённые тоже в нём)
+        self._set_list([], [])
+
+        self._set_data_len(0)
         self.prd_head = -1
         self.prd_free = PRD_HDR_SIZE
         self.prs_head = -1
         self.prs_free = PRS_HDR_SIZE
         self.prs_name = ""
 
+    def _set_data_len(self, data_len: int) -> None:
+        """Запись PRD: del_, first_spec, next_ и data_len байт данных."""
+        self.data_len = data_len
+        self._prd_rec = struct.Struct(f"<bii{data_len}s")
+
+    def _set_list(self, keys: List[str], offs: List[int]) -> None:
+        self._list_keys = keys
+        self._list_offs = offs
+        self._list_sorted = all(a <= b for a, b in zip(keys, keys[1:]))
+
     def prd_rec_size(self) -> int:
         return 1 + 4 + 4 + self.data_len
 
@@ -70,31 +114,83 @@ class PSApp:
         return 1 + 4 + 2 + 4
 
     def opened(self) -> bool:
-        return self.prd is not None and self.prs is not None
+        return self.prd_fd != -1 and self.prs_fd != -1
 
     def require_open(self) -> None:
         if not self.opened():
             raise RuntimeError("Сначала Create или Open.")
 
     def close(self) -> None:
-        for f in (self.prd, self.prs):
-            try:
-                if f:
-                    f.flush()
-                    f.close()
-            except Exception:
-                pass
-        self.prd = None
-        self.prs = None
+        self._close_files()
         self.prd_path = None
         self.prs_path = None
+        self._name_to_offs = {}
+        self._children = {}
+        self._links = {}
+        self._set_list([], [])
+
+    def _close_files(self) -> None:
+        for fd, mm, free in (
+            (self.prd_fd, self.prd_mm, self.prd_free),
+            (self.prs_fd, self.prs_mm, self.prs_free),
+        ):
+            if mm is not None:
+                grown = len(mm) > free
+                mm.flush()
+                mm.close()
+                # отображение растёт с запасом; хвост за free в файл не попадает
+                if grown:
+                    os.ftruncate(fd, free)
+            if fd != -1:
+                os.close(fd)
+        self.prd_fd = -1
+        self.prs_fd = -1
+        self.prd_mm = None
+        self.prs_mm = None
+
+    def _attach_prd(self, path: str, fd: int = -1) -> None:
+        self.prd_fd = fd if fd != -1 else os.open(path, O_RDWR_BIN)
+        self.prd_mm = mmap.mmap(self.prd_fd, 0)
+        self.prd_path = path
+
+    def _attach_prs(self, path: str, fd: int = -1) -> None:
+        self.prs_fd = fd if fd != -1 else os.open(path, O_RDWR_BIN)
+        self.prs_mm = mmap.mmap(self.prs_fd, 0)
+        self.prs_path = path
+
+    @staticmethod
+    def _create_file(path: str, size: int) -> int:
+        """Создать (обнулить) файл из size нулевых байт и вернуть его дескриптор."""
+        fd = os.open(path, O_RDWR_BIN | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.write(fd, bytes(size))
+        return fd
+
+    @staticmethod
+    def _reserve(mm: mmap.mmap, fd: int, end: int) -> mmap.mmap:
+        """Гарантировать end байт в отображении (растёт геометрически вместе
+        с файлом)."""
+        if end <= len(mm):
+            return mm
+        # не mmap.resize: без mremap (macOS, BSD) он не работает — файл расширяется
+        # отдельно и отображается заново; старое отображение закрывается только
+        # после успеха, иначе при ошибке (ENOSPC, EFBIG) объект остался бы закрытым
+        size = max(end, 2 * len(mm))
+        os.ftruncate(fd, size)
+        try:
+            new_mm = mmap.mmap(fd, 0)
+        except OSError:
+            os.ftruncate(fd, len(mm))
+            raise
+        mm.close()
+        return new_mm
 
     @staticmethod
     def valid_sig(path: str) -> bool:
-        if not os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                return f.read(2) == PRD_SIG
+        except FileNotFoundError:
             return False
-        with open(path, "rb") as f:
-            return f.read(2) == PRD_SIG
 
     def create(self, base_name: str, maxlen: int) -> None:
         """Создать новые файлы base_name.prd/.prs (перезапись на совести GUI)."""
@@ -106,86 +202,113 @@ class PSApp:
 
         self.close()
 
-        self.data_len = maxlen
+        self._set_data_len(maxlen)
         self.prd_head = -1
         self.prd_free = PRD_HDR_SIZE
         self.prs_head = -1
         self.prs_free = PRS_HDR_SIZE
         self.prs_name = os.path.basename(prs_path)
 
-        self.prd = open(prd_path, "wb+")
-        self.prs = open(prs_path, "wb+")
-        self.prd_path = prd_path
-        self.prs_path = prs_path
+        self._attach_prd(prd_path, self._create_file(prd_path, PRD_HDR_SIZE))
+        self._attach_prs(prs_path, self._create_file(prs_path, PRS_HDR_SIZE))
 
         self._prd_hdr_write()
         self._prs_hdr_write()
+        self._name_to_offs = {}
+        self._children = {}
+        self._links = {}
+        self._set_list([], [])
 
     def open(self, base_name: str) -> None:
         """Открыть base_name.prd и связанный .prs из заголовка."""
         prd_path = base_name + ".prd"
-        if not os.path.exists(prd_path):
-            raise FileNotFoundError("PRD не найден.")
-        if not self.valid_sig(prd_path):
+        # один open на проверку существования и сигнатуры; этот же дескриптор
+        # и отображается
+        try:
+            fd = os.open(prd_path, O_RDWR_BIN)
+        except FileNotFoundError:
+            raise FileNotFoundError("PRD не найден.") from None
+        if os.read(fd, 2) != PRD_SIG:
+            os.close(fd)
             raise RuntimeError("Неверная сигнатура PRD.")
 
         self.close()
 
-        self.prd = open(prd_path, "rb+")
-        self.prd_path = prd_path
+        self._attach_prd(prd_path, fd)
         self._prd_hdr_read()
 
         prs_path = os.path.join(os.path.dirname(prd_path) or ".", self.prs_name)
-        if not os.path.exists(prs_path):
-            raise FileNotFoundError("Связанный PRS не найден.")
-        self.prs = open(prs_path, "rb+")
-        self.prs_path = prs_path
+        try:
+            self._attach_prs(prs_path)
+        except FileNotFoundError:
+            raise FileNotFoundError("Связанный PRS не найден.") from None
         self._prs_hdr_read()
+        self._build_index()
+
+    def _build_index(self) -> None:
+        index: Dict[str, List[int]] = {}
+        offs, _, _, nexts, datas = self._prd_columns()
+        key = self._data_key
+        keys = [key(data) for data in datas]
+        for off, k in zip(offs, keys):
+            index.setdefault(k, []).append(off)
+        self._name_to_offs = index
+        self._children = {}
+        self._links = {}
+
+        list_keys: List[str] = []
+        list_offs: List[int] = []
+        size = self.prd_rec_size()
+        ptr = self.prd_head
+        # не больше n шагов: зацикленный (повреждённый) список просто обрывается
+        for _ in range(len(keys)):
+            if ptr == -1:
+                break
+            i = (ptr - PRD_HDR_SIZE) // size
+            list_keys.append(keys[i])
+            list_offs.append(ptr)
+            ptr = nexts[i]
+        self._set_list(list_keys, list_offs)
 
     def _prd_hdr_write(self) -> None:
-        assert self.prd is not None
-        self.prd.seek(0)
-        self.prd.write(PRD_SIG)
-        self.prd.write(struct.pack(U16, self.data_len))
-        self.prd.write(struct.pack(I32, self.prd_head))
-        self.prd.write(struct.pack(I32, self.prd_free))
-        nb = self.prs_name.encode("ascii", "ignore")[:16]
-        self.prd.write(nb + b"\x00" * (16 - len(nb)))
+        mm = self.prd_mm
+        assert mm is not None
+        nb = self.prs_name.encode("ascii", "ignore")
+        PRD_HDR.pack_into(
+            mm, 0, PRD_SIG, self.data_len, self.prd_head, self.prd_free, nb
+        )
 
     def _prd_hdr_read(self) -> None:
-        assert self.prd is not None
-        self.prd.seek(0)
-        if self.prd.read(2) != PRD_SIG:
+        mm = self.prd_mm
+        assert mm is not None
+        # весь заголовок одним unpack_from: быстрее и int.from_bytes, и полевого чтения
+        sig, data_len, head, free, nb = PRD_HDR.unpack_from(mm, 0)
+        if sig != PRD_SIG:
             raise RuntimeError("Неверная сигнатура PRD.")
-        self.data_len = struct.unpack(U16, self.prd.read(2))[0]
-        self.prd_head = struct.unpack(I32, self.prd.read(4))[0]
-        self.prd_free = struct.unpack(I32, self.prd.read(4))[0]
-        self.prs_name = (
-            self.prd.read(16)
-            .split(b"\x00", 1)[0]
-            .decode("ascii", "ignore")
-            .strip()
-        )
+        self._set_data_len(data_len)
+        self.prd_head = head
+        self.prd_free = free
+        self.prs_name = nb.split(b"\x00", 1)[0].decode("ascii", "ignore").strip()
 
     def _prs_hdr_write(self) -> None:
-        assert self.prs is not None
-        self.prs.seek(0)
-        self.prs.write(struct.pack(I32, self.prs_head))
-        self.prs.write(struct.pack(I32, self.prs_free))
+        mm = self.prs_mm
+        assert mm is not None
+        PRS_HDR.pack_into(mm, 0, self.prs_head, self.prs_free)
 
     def _prs_hdr_read(self) -> None:
-        assert self.prs is not None
-        self.prs.seek(0)
-        self.prs_head = struct.unpack(I32, self.prs.read(4))[0]
-        self.prs_free = struct.unpack(I32, self.prs.read(4))[0]
+        mm = self.prs_mm
+        assert mm is not None
+        self.prs_head, self.prs_free = PRS_HDR.unpack_from(mm, 0)
 
     def _prd_read(self, off: int) -> PrdRec:
-        assert self.prd is not None
-        self.prd.seek(off)
-        del_ = struct.unpack(I8, self.prd.read(1))[0]
-        first_spec = struct.unpack(I32, self.prd.read(4))[0]
-        next_ = struct.unpack(I32, self.prd.read(4))[0]
-        raw = self.prd.read(self.data_len).decode("ascii", "ignore").rstrip(" ")
+        assert self.prd_mm is not None
+        del_, first_spec, next_, data = self._prd_rec.unpack_from(self.prd_mm, off)
+        typ, name = self._decode_data(data)
+        return PrdRec(off, del_, first_spec, next_, typ, name)
+
+    @staticmethod
+    def _decode_data(data: bytes) -> Tuple[str, str]:
+        raw = data.decode("ascii", "ignore").rstrip(" ")
 
         typ = "I"
         name = raw.strip()
@@ -193,120 +316,166 @@ class PSApp:
             typ = raw[0]
             name = raw[2:].strip()
 
-        return PrdRec(off, del_, first_spec, next_, typ, name)
+        return typ, name
+
+    @staticmethod
+    def _data_key(data: bytes) -> str:
+        """Имя в нижнем регистре прямо из байтов поля данных
+        (как _decode_data(...)[1].lower())."""
+        if not data.isascii():
+            return PSApp._decode_data(data)[1].lower()
+        raw = data.rstrip(b" ")
+        name = raw[2:] if raw[1:2] == b":" else raw
+        return name.strip(ASCII_WS).lower().decode("ascii")
 
     def _prd_write(self, r: PrdRec) -> None:
-        assert self.prd is not None
-        self.prd.seek(r.off)
-        self.prd.write(struct.pack(I8, r.del_))
-        self.prd.write(struct.pack(I32, r.first_spec))
-        self.prd.write(struct.pack(I32, r.next_))
+        assert self.prd_mm is not None
+        data = self._encode_data(r.typ, r.name)
+        end = r.off + self._prd_rec.size
+        mm = self.prd_mm = self._reserve(self.prd_mm, self.prd_fd, end)
+        self._prd_rec.pack_into(mm, r.off, r.del_, r.first_spec, r.next_, data)
 
-        payload = f"{r.typ}:{r.name}".encode("ascii", "ignore")
-        fixed = bytearray(b" " * self.data_len)
-        fixed[: min(self.data_len, len(payload))] = payload[: self.data_len]
-        self.prd.write(bytes(fixed))
+    def _encode_data(self, typ: str, name: str) -> bytes:
+        """Поле данных "T:name", дополненное пробелами до data_len."""
+        payload = f"{typ}:{name}".encode("ascii", "ignore")[: self.data_len]
+        return payload.ljust(self.data_len, b" ")
 
     def _prs_read(self, off: int) -> PrsRec:
-        assert self.prs is not None
-        self.prs.seek(off)
-        del_ = struct.unpack(I8, self.prs.read(1))[0]
-        comp_off = struct.unpack(I32, self.prs.read(4))[0]
-        qty = struct.unpack(I16, self.prs.read(2))[0]
-        next_ = struct.unpack(I32, self.prs.read(4))[0]
+        assert self.prs_mm is not None
+        del_, comp_off, qty, next_ = PRS_REC.unpack_from(self.prs_mm, off)
         return PrsRec(off, del_, comp_off, qty, next_)
 
     def _prs_write(self, r: PrsRec) -> None:
-        assert self.prs is not None
-        self.prs.seek(r.off)
-        self.prs.write(struct.pack(I8, r.del_))
-        self.prs.write(struct.pack(I32, r.comp_off))
-        self.prs.write(struct.pack(I16, r.qty))
-        self.prs.write(struct.pack(I32, r.next_))
+        assert self.prs_mm is not None
+        end = r.off + PRS_REC.size
+        mm = self.prs_mm = self._reserve(self.prs_mm, self.prs_fd, end)
+        PRS_REC.pack_into(mm, r.off, r.del_, r.comp_off, r.qty, r.next_)
 
     def scan_prd_physical(self) -> Iterable[PrdRec]:
-        self.require_open()
-        size = self.prd_rec_size()
-        off = PRD_HDR_SIZE
-        while off + size <= self.prd_free:
-            yield self._prd_read(off)
-            off += size
+        # смещения — range по шагу записи, поля идут параллельно через zip,
+        # без индексации
+        decode = self._decode_data
+        for off, del_, first_spec, next_, data in zip(*self._prd_columns()):
+            yield PrdRec(off, del_, first_spec, next_, *decode(data))
 
     def scan_prs_physical(self) -> Iterable[PrsRec]:
+        for off, del_, comp_off, qty, next_ in zip(*self._prs_columns()):
+            yield PrsRec(off, del_, comp_off, qty, next_)
+
+    def _prd_columns(self) -> Tuple[range, tuple, tuple, tuple, tuple]:
+        """Все записи PRD столбцами (off, del_, first_spec, next_, data) — без
+        PrdRec."""
         self.require_open()
+        assert self.prd_mm is not None
+        size = self.prd_rec_size()
+        n = max(0, (self.prd_free - PRD_HDR_SIZE) // size)
+        offs = range(PRD_HDR_SIZE, PRD_HDR_SIZE + n * size, size)
+        if n == 0:
+            return offs, (), (), (), ()
+        # разбор пакетом через iter_unpack прямо по отображению, без копии области
+        # записей; memoryview освобождается сразу, иначе mmap нельзя было бы
+        # расширить
+        with memoryview(self.prd_mm)[PRD_HDR_SIZE : PRD_HDR_SIZE + n * size] as body:
+            dels, firsts, nexts, datas = zip(*self._prd_rec.iter_unpack(body))
+        return offs, dels, firsts, nexts, datas
+
+    def _prs_columns(self) -> Tuple[range, tuple, tuple, tuple, tuple]:
+        """Все записи PRS столбцами (off, del_, comp_off, qty, next_)."""
+        self.require_open()
+        assert self.prs_mm is not None
         size = self.prs_rec_size()
-        off = PRS_HDR_SIZE
-        while off + size <= self.prs_free:
-            yield self._prs_read(off)
-            off += size
+        n = max(0, (self.prs_free - PRS_HDR_SIZE) // size)
+        offs = range(PRS_HDR_SIZE, PRS_HDR_SIZE + n * size, size)
+        if n == 0:
+            return offs, (), (), (), ()
+        with memoryview(self.prs_mm)[PRS_HDR_SIZE : PRS_HDR_SIZE + n * size] as body:
+            dels, comps, qtys, nexts = zip(*PRS_REC.iter_unpack(body))
+        return offs, dels, comps, qtys, nexts
+
+    def _active_prd(self) -> List[PrdRec]:
+        """Неудалённые записи PRD в физическом порядке; данные декодируются
+        только у них."""
+        decode = self._decode_data
+        return [
+            PrdRec(off, 0, first_spec, next_, *decode(data))
+            for off, del_, first_spec, next_, data in zip(*self._prd_columns())
+            if del_ == 0
+        ]
 
     def iter_prd_logical(self) -> Iterable[PrdRec]:
         self.require_open()
+        mm = self.prd_mm
+        unpack = self._prd_rec.unpack_from
+        decode = self._decode_data
+        size = self.prd_rec_size()
+        # отметки посещения по номеру записи: смещения кратны размеру записи
+        # от заголовка
+        seen = bytearray(len(mm) // size + 1)
         ptr = self.prd_head
-        seen = set()
         while ptr != -1:
-            if ptr in seen:
+            idx = (ptr - PRD_HDR_SIZE) // size
+            if seen[idx]:
                 raise RuntimeError("Цикл в логическом списке PRD.")
-            seen.add(ptr)
-            r = self._prd_read(ptr)
-            if r.del_ == 0:
-                yield r
-            ptr = r.next_
+            seen[idx] = 1
+            # удалённые записи в списке только проходятся, имя у них не декодируется
+            del_, first_spec, next_, data = unpack(mm, ptr)
+            if del_ == 0:
+                yield PrdRec(ptr, del_, first_spec, next_, *decode(data))
+            ptr = next_
 
     def find_any(self, name: str) -> Optional[PrdRec]:
-        name = norm(name)
-        for r in self.scan_prd_physical():
-            if eq(r.name, name):
-                return r
-        return None
+        """Первая физическая запись с этим именем, как в линейном поиске."""
+        self.require_open()
+        offs = self._name_to_offs.get(norm(name).lower())
+        return None if not offs else self._prd_read(offs[0])
 
     def find_active(self, name: str) -> Optional[PrdRec]:
-        name = norm(name)
-        for r in self.scan_prd_physical():
-            if r.del_ == 0 and eq(r.name, name):
-                return r
+        """Первая неудалённая физическая запись с этим именем."""
+        self.require_open()
+        mm = self.prd_mm
+        # признак удаления — первый байт записи; удалённые записи не декодируются
+        for off in self._name_to_offs.get(norm(name).lower(), ()):
+            if mm[off] == 0:
+                return self._prd_read(off)
         return None
 
-    def _insert_sorted(self, new_off: int) -> None:
-        new = self._prd_read(new_off)
-        key = new.name.lower()
-
-        if self.prd_head == -1:
-            new.next_ = -1
-            self._prd_write(new)
-            self.prd_head = new_off
-            self._prd_hdr_write()
-            return
-
-        prev_off = -1
-        cur_off = self.prd_head
-        while cur_off != -1:
-            cur = self._prd_read(cur_off)
-            if key < cur.name.lower():
-                break
-            prev_off = cur_off
-            cur_off = cur.next_
+    def _insert_sorted(self, new: PrdRec, key: str) -> None:
+        """Записать new, вставив его в логический список по ключу key
+        (заголовок пишет вызывающий)."""
+        keys, offs = self._list_keys, self._list_offs
+        if self._list_sorted:
+            idx = bisect_right(keys, key)
+        else:
+            # неупорядоченный список из чужого файла: перед первым большим ключом
+            idx = next((i for i, k in enumerate(keys) if key < k), len(keys))
 
-        new.next_ = cur_off
+        new.next_ = offs[idx] if idx < len(offs) else -1
         self._prd_write(new)
 
-        if prev_off == -1:
-            self.prd_head = new_off
-            self._prd_hdr_write()
+        if idx == 0:
+            self.prd_head = new.off
         else:
-            prev = self._prd_read(prev_off)
-            prev.next_ = new_off
-            self._prd_write(prev)
+            I32.pack_into(self.prd_mm, offs[idx - 1] + PRD_NEXT_OFF, new.off)
+        keys.insert(idx, key)
+        offs.insert(idx, new.off)
 
     def rebuild_alphabetical(self) -> None:
-        active = [r for r in self.scan_prd_physical() if r.del_ == 0]
-        active.sort(key=lambda x: x.name.lower())
+        # порядок считается по столбцам: ключ прямо из байтов данных, PrdRec не
+        # создаются; при равных ключах смещение сохраняет физический порядок
+        offs, dels, _, _, datas = self._prd_columns()
+        key = self._data_key
+        pairs = sorted(
+            (key(data), off) for off, del_, data in zip(offs, dels, datas) if del_ == 0
+        )
+        order = [off for _, off in pairs]
+        self._set_list([k for k, _ in pairs], order)
 
-        for i, r in enumerate(active):
-            r.next_ = -1 if i == len(active) - 1 else active[i + 1].off
-            self._prd_write(r)
+        # меняются только указатели next_, остальное в записях не трогаем
+        mm = self.prd_mm
+        for off, next_ in zip(order, order[1:] + [-1]):
+            I32.pack_into(mm, off + PRD_NEXT_OFF, next_)
 
-        self.prd_head = -1 if not active else active[0].off
+        self.prd_head = order[0] if order else -1
         self._prd_hdr_write()
 
     def get_components(self) -> List[Tuple[str, str]]:
@@ -318,12 +487,15 @@ class PSApp:
         name = norm(name)
         if not name:
             raise ValueError("Пустое имя.")
-        if self.find_any(name) is not None:
+        # сравниваем с именем в том виде, в каком оно ляжет в запись (ASCII, обрезка)
+        payload = f"{typ}:{name}".encode("ascii", "ignore")[: self.data_len]
+        key = self._data_key(payload)
+        if key in self._name_to_offs:
             raise ValueError("Дублирование имени компонента.")
 
         rec = PrdRec(self.prd_free, 0, -1, -1, typ, name)
-        self._prd_write(rec)
-        self._insert_sorted(rec.off)
+        self._insert_sorted(rec, key)
+        self._name_to_offs[key] = [rec.off]
 
         self.prd_free += self.prd_rec_size()
         self._prd_hdr_write()
@@ -334,10 +506,11 @@ class PSApp:
         if comp is None:
             raise ValueError("Компонент не найден.")
 
-        for c in self.scan_prd_physical():
-            if c.del_ != 0 or c.off == comp.off:
+        offs, dels, firsts, _, _ = self._prd_columns()
+        for off, del_, first_spec in zip(offs, dels, firsts):
+            if del_ != 0 or off == comp.off:
                 continue
-            ptr = c.first_spec
+            ptr = first_spec
             while ptr != -1:
                 sr = self._prs_read(ptr)
                 if sr.del_ == 0 and sr.comp_off == comp.off:
@@ -346,15 +519,25 @@ class PSApp:
                     )
                 ptr = sr.next_
 
-        comp.del_ = -1
-        self._prd_write(comp)
+        self._set_deleted(comp, -1)
 
+    def _set_deleted(self, comp: PrdRec, flag: int) -> None:
+        """Проставить del_ компоненту и всей его спецификации."""
+        # сначала собрать цепочку, затем писать только байты del_ по возрастанию
+        # смещений
+        chain: List[int] = []
         ptr = comp.first_spec
         while ptr != -1:
-            sr = self._prs_read(ptr)
-            sr.del_ = -1
-            self._prs_write(sr)
-            ptr = sr.next_
+            chain.append(ptr)
+            ptr = self._prs_read(ptr).next_
+
+        comp.del_ = flag
+        # del_ компонента влияет на списки детей всех его родителей
+        self._children = {}
+        self._links.pop(comp.off, None)
+        I8.pack_into(self.prd_mm, comp.off, flag)
+        for off in sorted(chain):
+            I8.pack_into(self.prs_mm, off, flag)
 
     def restore_one(self, name: str) -> None:
         self.require_open()
@@ -362,28 +545,21 @@ class PSApp:
         if comp is None:
             raise ValueError("Компонент не найден.")
 
-        comp.del_ = 0
-        self._prd_write(comp)
-
-        ptr = comp.first_spec
-        while ptr != -1:
-            sr = self._prs_read(ptr)
-            sr.del_ = 0
-            self._prs_write(sr)
-            ptr = sr.next_
-
+        self._set_deleted(comp, 0)
         self.rebuild_alphabetical()
 
     def restore_all(self) -> None:
         self.require_open()
-        for c in self.scan_prd_physical():
-            if c.del_ != 0:
-                c.del_ = 0
-                self._prd_write(c)
-        for s in self.scan_prs_physical():
-            if s.del_ != 0:
-                s.del_ = 0
-                self._prs_write(s)
+        # снимается только байт del_, остальные поля записей не декодируются
+        for mm, (offs, dels, *_) in (
+            (self.prd_mm, self._prd_columns()),
+            (self.prs_mm, self._prs_columns()),
+        ):
+            for off, del_ in zip(offs, dels):
+                if del_ != 0:
+                    I8.pack_into(mm, off, 0)
+        self._children = {}
+        self._links = {}
         self.rebuild_alphabetical()
 
     def _would_create_cycle(self, parent_off: int, child_off: int) -> bool:
@@ -393,29 +569,54 @@ class PSApp:
 
     def _has_path(self, start_off: int, target_off: int) -> bool:
         stack = [start_off]
-        visited = set()
+        size = self.prd_rec_size()
+        visited = bytearray(len(self.prd_mm) // size + 1)
+        children = self._children
 
         while stack:
             cur_off = stack.pop()
             if cur_off == target_off:
                 return True
-            if cur_off in visited:
+            idx = (cur_off - PRD_HDR_SIZE) // size
+            if visited[idx]:
                 continue
-            visited.add(cur_off)
+            visited[idx] = 1
 
-            cur = self._prd_read(cur_off)
-            ptr = cur.first_spec
-            while ptr != -1:
-                sr = self._prs_read(ptr)
-                if sr.del_ == 0:
-                    child_off = sr.comp_off
-                    child = self._prd_read(child_off)
-                    if child.del_ == 0:
-                        stack.append(child_off)
-                ptr = sr.next_
+            kids = children.get(cur_off)
+            if kids is None:
+                kids = children[cur_off] = self._active_children(cur_off)
+            stack.extend(kids)
 
         return False
 
+    def _active_children(self, parent_off: int) -> List[int]:
+        """Смещения активных детей по активным связям спецификации."""
+        kids: List[int] = []
+        mm = self.prd_mm
+        # из записи родителя нужен только first_spec — имя не декодируется
+        ptr = I32.unpack_from(mm, parent_off + PRD_FIRST_OFF)[0]
+        while ptr != -1:
+            sr = self._prs_read(ptr)
+            if sr.del_ == 0 and mm[sr.comp_off] == 0:
+                kids.append(sr.comp_off)
+            ptr = sr.next_
+        return kids
+
+    def _spec_links(self, parent: PrdRec) -> Dict[int, int]:
+        """Активные связи parent (первая в цепочке на компонент), лениво с кэшем."""
+        links = self._links.get(parent.off)
+        if links is None:
+            links = {}
+            mm = self.prs_mm
+            ptr = parent.first_spec
+            while ptr != -1:
+                del_, comp_off, _, next_ = PRS_REC.unpack_from(mm, ptr)
+                if del_ == 0:
+                    links.setdefault(comp_off, ptr)
+                ptr = next_
+            self._links[parent.off] = links
+        return links
+
     def add_spec(self, a: str, b: str, qty: int = 1) -> None:
         """Add link A/B with quantity. If A/B exists -> increase qty. Forbid cycles."""
         self.require_open()
@@ -437,31 +638,28 @@ class PSApp:
         if self._would_create_cycle(parent.off, child.off):
             raise ValueError("Cycle detected: this link would create a loop.")
 
-        ptr = parent.first_spec
-        while ptr != -1:
+        links = self._spec_links(parent)
+        ptr = links.get(child.off)
+        if ptr is not None:
             sr = self._prs_read(ptr)
-            if sr.del_ == 0 and sr.comp_off == child.off:
-                sr.qty += qty
-                self._prs_write(sr)
-                return
-            ptr = sr.next_
+            sr.qty += qty
+            self._prs_write(sr)
+            return
 
-        sr = PrsRec(off=self.prs_free, del_=0, comp_off=child.off, qty=qty, next_=-1)
+        # порядок в цепочке не наблюдаем (get_spec сортирует), поэтому вставка в голову
+        sr = PrsRec(
+            off=self.prs_free,
+            del_=0,
+            comp_off=child.off,
+            qty=qty,
+            next_=parent.first_spec,
+        )
         self._prs_write(sr)
 
-        if parent.first_spec == -1:
-            parent.first_spec = sr.off
-            self._prd_write(parent)
-        else:
-            cur = parent.first_spec
-            last = -1
-            while cur != -1:
-                r = self._prs_read(cur)
-                last = cur
-                cur = r.next_
-            tail = self._prs_read(last)
-            tail.next_ = sr.off
-            self._prs_write(tail)
+        parent.first_spec = sr.off
+        self._prd_write(parent)
+        self._children.pop(parent.off, None)
+        links[child.off] = sr.off
 
         self.prs_free += self.prs_rec_size()
         self._prs_hdr_write()
@@ -481,16 +679,14 @@ class PSApp:
         if child is None:
             raise ValueError("B component not found.")
 
-        ptr = parent.first_spec
-        while ptr != -1:
-            sr = self._prs_read(ptr)
-            if sr.del_ == 0 and sr.comp_off == child.off:
-                sr.del_ = -1
-                self._prs_write(sr)
-                return
-            ptr = sr.next_
+        ptr = self._spec_links(parent).get(child.off)
+        if ptr is None:
+            raise ValueError("A/B link not found.")
 
-        raise ValueError("A/B link not found.")
+        I8.pack_into(self.prs_mm, ptr, -1)
+        self._children.pop(parent.off, None)
+        # при повторных связях в цепочке (чужой файл) следующая должна найтись заново
+        self._links.pop(parent.off, None)
 
     def get_spec(self, a: str) -> List[Tuple[str, str, int]]:
         self.require_open()
@@ -502,20 +698,15 @@ class PSApp:
         if parent.typ == "D":
             raise ValueError("Specification is not allowed for Detail.")
 
-        result: List[Tuple[str, str, int]] = []
-        ptr = parent.first_spec
-        while ptr != -1:
-            sr = self._prs_read(ptr)
-            if sr.del_ == 0:
-                child = self._prd_read(sr.comp_off)
-                if child.del_ == 0:
-                    result.append((child.name, child.typ, sr.qty))
-            ptr = sr.next_
-
-        result.sort(key=lambda x: x[0].lower())
-        return result
+        return [
+            (child.name, child.typ, qty) for child, qty in self._spec_children(parent)
+        ]
 
     def build_tree_text(self, name: str) -> str:
+        return "\n".join(self.build_tree_text_iter(name))
+
+    def build_tree_text_iter(self, name: str) -> Iterator[str]:
+        """Строки дерева по одной (проверки выполняются сразу, обход — лениво)."""
         self.require_open()
         root = self.find_active(name)
         if root is None:
@@ -523,43 +714,79 @@ class PSApp:
         if root.typ == "D":
             raise ValueError("Tree is not allowed for Detail.")
 
-        out: List[str] = [root.name]
-        self._tree_dfs(root, prefix="", stack=set(), out=out)
-        return "\n".join(out)
-
-    def _tree_dfs(self, node: PrdRec, prefix: str, stack: set, out: List[str]) -> None:
+        return self._tree_lines(root)
+
+    def _tree_lines(self, root: PrdRec) -> Iterator[str]:
+        yield root.name
+        yield from self._tree_dfs(root, prefix="", stack=set(), adj={}, recs={})
+
+    def _spec_children(
+        self, parent: PrdRec, recs: Optional[Dict[int, PrdRec]] = None
+    ) -> List[Tuple[PrdRec, int]]:
+        """Активные компоненты спецификации parent с количеством, по алфавиту."""
+        # recs: уже прочитанные записи PRD по смещению, общие для всего обхода дерева
+        if recs is None:
+            recs = {}
+        prs_mm, prd_mm = self.prs_mm, self.prd_mm
+        prd_read = self._prd_read
+        keyed: List[Tuple[str, PrdRec, int]] = []
+        ptr = parent.first_spec
+        while ptr != -1:
+            del_, comp_off, qty, next_ = PRS_REC.unpack_from(prs_mm, ptr)
+            # удалённый компонент отсеивается по байту del_, его запись не читается
+            if del_ == 0 and prd_mm[comp_off] == 0:
+                child = recs.get(comp_off)
+                if child is None:
+                    child = recs[comp_off] = prd_read(comp_off)
+                keyed.append((child.name_lc, child, qty))
+            ptr = next_
+
+        keyed.sort(key=itemgetter(0))
+        return [(child, qty) for _, child, qty in keyed]
+
+    def _tree_dfs(
+        self,
+        node: PrdRec,
+        prefix: str,
+        stack: set,
+        adj: Dict[int, List[Tuple[PrdRec, int]]],
+        recs: Dict[int, PrdRec],
+    ) -> Iterator[str]:
         if node.off in stack:
-            out.append(prefix + "└─ [cycle detected]")
+            yield prefix + "└─ [cycle detected]"
             return
         stack.add(node.off)
 
-        items = self.get_spec(node.name)
-        for i, (child_name, child_typ, qty) in enumerate(items):
+        # adj: спецификации уже посещённых узлов (общие подсборки не перечитываются)
+        items = adj.get(node.off)
+        if items is None:
+            items = adj[node.off] = self._spec_children(node, recs)
+
+        for i, (child, qty) in enumerate(items):
             last = i == len(items) - 1
             branch = "└─ " if last else "├─ "
             suffix = f" x{qty}" if qty != 1 else ""
-            out.append(prefix + branch + child_name + suffix)
-
-            if child_typ != "D":
-                child_rec = self.find_active(child_name)
-                if child_rec is not None:
-                    self._tree_dfs(
-                        child_rec,
-                        prefix + ("   " if last else "│  "),
-                        stack,
-                        out,
-                    )
+            yield prefix + branch + child.name + suffix
+
+            if child.typ != "D":
+                yield from self._tree_dfs(
+                    child,
+                    prefix + ("   " if last else "│  "),
+                    stack,
+                    adj,
+                    recs,
+                )
 
         stack.remove(node.off)
 
     def truncate(self) -> None:
         self.require_open()
-        assert self.prd_path and self.prs_path and self.prd and self.prs
+        assert self.prd_path and self.prs_path
 
         prd_path, prs_path = self.prd_path, self.prs_path
 
-        active = [c for c in self.scan_prd_physical() if c.del_ == 0]
-        active.sort(key=lambda x: x.name.lower())
+        active = self._active_prd()
+        active.sort(key=attrgetter("name_lc"))
 
         new_prd_off: Dict[int, int] = {}
         w_prd = PRD_HDR_SIZE
@@ -578,91 +805,63 @@ class PSApp:
                 ptr = sr.next_
             buckets[p.off] = keep
 
+        # новые файлы целиком собираются в памяти и пишутся одним write() каждый
+        rec_size = self.prd_rec_size()
+        prs_rec_size = self.prs_rec_size()
+        n_prs = sum(len(items) for items in buckets.values())
+        prd_out = bytearray(PRD_HDR_SIZE + len(active) * rec_size)
+        prs_out = bytearray(PRS_HDR_SIZE + n_prs * prs_rec_size)
+
+        # оба буфера заполняются за один последовательный проход в порядке родителей:
+        # first_spec родителя известен заранее — это текущая позиция записи в PRS
+        w = PRD_HDR_SIZE
+        w_prs = PRS_HDR_SIZE
+        first_prs: Optional[int] = None
+
+        for i, old in enumerate(active):
+            next_ = -1 if i == len(active) - 1 else w + rec_size
+            items = buckets[old.off]
+            first_spec = w_prs if items else -1
+
+            data = self._encode_data(old.typ, old.name)
+            self._prd_rec.pack_into(prd_out, w, 0, first_spec, next_, data)
+            w += rec_size
+
+            if not items:
+                continue
+            if first_prs is None:
+                first_prs = first_spec
+            for j, (child_old, qty) in enumerate(items):
+                child_new = new_prd_off[child_old]
+                next_prs = -1 if j == len(items) - 1 else w_prs + prs_rec_size
+                PRS_REC.pack_into(prs_out, w_prs, 0, child_new, qty, next_prs)
+                w_prs += prs_rec_size
+
+        # заголовки — одним pack_into каждый; 16s сам обрезает и дополняет имя нулями
+        prd_head = -1 if not active else PRD_HDR_SIZE
+        nb = os.path.basename(prs_path).encode("ascii", "ignore")
+        PRD_HDR.pack_into(prd_out, 0, PRD_SIG, self.data_len, prd_head, w, nb)
+
+        prs_head = first_prs if first_prs is not None else -1
+        PRS_HDR.pack_into(prs_out, 0, prs_head, w_prs)
+
         tmp_prd = prd_path + ".tmp"
         tmp_prs = prs_path + ".tmp"
 
-        self.prd.close()
-        self.prs.close()
-
-        with open(tmp_prd, "wb+") as prd_new, open(tmp_prs, "wb+") as prs_new:
-            prs_name = os.path.basename(prs_path)
-            prd_head = -1 if not active else PRD_HDR_SIZE
-            prd_free = PRD_HDR_SIZE
-            prs_head = -1
-            prs_free = PRS_HDR_SIZE
-
-            prd_new.write(PRD_SIG)
-            prd_new.write(struct.pack(U16, self.data_len))
-            prd_new.write(struct.pack(I32, prd_head))
-            prd_new.write(struct.pack(I32, prd_free))
-            nb = prs_name.encode("ascii", "ignore")[:16]
-            prd_new.write(nb + b"\x00" * (16 - len(nb)))
-
-            prs_new.write(struct.pack(I32, prs_head))
-            prs_new.write(struct.pack(I32, prs_free))
-
-            w = PRD_HDR_SIZE
-            for i, old in enumerate(active):
-                next_ = -1 if i == len(active) - 1 else w + self.prd_rec_size()
-                rec = PrdRec(w, 0, -1, next_, old.typ, old.name)
-
-                prd_new.seek(rec.off)
-                prd_new.write(struct.pack(I8, rec.del_))
-                prd_new.write(struct.pack(I32, rec.first_spec))
-                prd_new.write(struct.pack(I32, rec.next_))
-
-                payload = f"{rec.typ}:{rec.name}".encode("ascii", "ignore")
-                fixed = bytearray(b" " * self.data_len)
-                fixed[: min(self.data_len, len(payload))] = payload[: self.data_len]
-                prd_new.write(bytes(fixed))
-                w += self.prd_rec_size()
-
-            prd_free = w
-            prd_new.seek(2 + 2 + 4)
-            prd_new.write(struct.pack(I32, prd_free))
-
-            w_prs = PRS_HDR_SIZE
-            first_prs: Optional[int] = None
-
-            for p in active:
-                items = buckets[p.off]
-                if not items:
-                    continue
-
-                first_for_parent = w_prs
-                for i, (child_old, qty) in enumerate(items):
-                    child_new = new_prd_off[child_old]
-                    next_ = -1 if i == len(items) - 1 else w_prs + self.prs_rec_size()
-                    sr = PrsRec(w_prs, 0, child_new, qty, next_)
-
-                    prs_new.seek(sr.off)
-                    prs_new.write(struct.pack(I8, sr.del_))
-                    prs_new.write(struct.pack(I32, sr.comp_off))
-                    prs_new.write(struct.pack(I16, sr.qty))
-                    prs_new.write(struct.pack(I32, sr.next_))
-                    w_prs += self.prs_rec_size()
-
-                parent_new = new_prd_off[p.off]
-                prd_new.seek(parent_new + 1)
-                prd_new.write(struct.pack(I32, first_for_parent))
-                if first_prs is None:
-                    first_prs = first_for_parent
-
-            prs_head = first_prs if first_prs is not None else -1
-            prs_free = w_prs
-            prs_new.seek(0)
-            prs_new.write(struct.pack(I32, prs_head))
-            prs_new.write(struct.pack(I32, prs_free))
+        self._close_files()
+
+        with open(tmp_prd, "wb") as prd_new, open(tmp_prs, "wb") as prs_new:
+            prd_new.write(prd_out)
+            prs_new.write(prs_out)
 
         os.replace(tmp_prd, prd_path)
         os.replace(tmp_prs, prs_path)
 
-        self.prd = open(prd_path, "rb+")
-        self.prs = open(prs_path, "rb+")
-        self.prd_path = prd_path
-        self.prs_path = prs_path
+        self._attach_prd(prd_path)
+        self._attach_prs(prs_path)
         self._prd_hdr_read()
         self._prs_hdr_read()
+        self._build_index()
 
 
 def run_console() -> None: